@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for structattr
+
+Measures from_bytes(), to_bytes(), validate() and len() on a number of
+representative message layouts, both per message and in bulk. Results are
+written as JSON, so runs on different versions can be compared:
+
+    PYTHONPATH=src python benchmarks/run.py -o before.json
+    PYTHONPATH=src python benchmarks/run.py -o after.json
+    PYTHONPATH=src python benchmarks/run.py --compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import attr
+import bitstruct
+import structattr
+from structattr.types import UInt, Bool, FixedPointSInt, Enum, SInt, Bytes
+
+try:
+    from structattr.types import BytesView
+except ImportError:  # older versions
+    BytesView = None
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class ByteAligned:
+    a: UInt(8)
+    b: UInt(16)
+    c: UInt(32)
+    d: SInt(8)
+    e: SInt(16)
+    f: SInt(32)
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class Bitfield:
+    header: UInt(8)
+    flag: Bool
+
+    class Mode(Enum(2)):
+        Off = 0
+        On = 1
+        Timer = 3
+    mode: Mode
+    value: SInt(5)
+    fvalue: FixedPointSInt(integer_bits=6, fractional_bits=2)
+    blob: Bytes(2)
+
+
+class State(Enum(4)):
+    Idle = 0
+    Starting = 1
+    Running = 2
+    Stopping = 3
+    Stopped = 4
+    Failed = 5
+    # 6-15 undefined
+
+
+EnumHeavy = structattr.add_methods(attr.make_class(
+    'EnumHeavy',
+    {f'state{i}': attr.ib(type=State) for i in range(16)},
+    slots=True,
+))
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class BlobHeavy:
+    header: UInt(16)
+    payload: Bytes(4096)
+    trailer: UInt(16)
+
+
+Wide = structattr.add_methods(attr.make_class(
+    'Wide',
+    {f'field{i}': attr.ib(type=UInt(4) if i % 3 else UInt(8)) for i in range(120)},
+    slots=True,
+))
+
+
+def payload(cls, byte: int = 0x5a) -> bytes:
+    return bytes([byte]) * cls.__len__()
+
+
+LAYOUTS = {
+    'byte_aligned': (ByteAligned, payload(ByteAligned)),
+    'bitfield': (Bitfield, b'\x12\xbf\xfe\xab\xcd'),
+    'enum_heavy': (EnumHeavy, bytes([0x12, 0x34, 0x50, 0x01] * 2)),
+    'blob_heavy': (BlobHeavy, payload(BlobHeavy)),
+    'wide': (Wide, payload(Wide)),
+}
+
+if BytesView is not None:
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class BlobViewHeavy:
+        header: UInt(16)
+        payload: BytesView(4096)
+        trailer: UInt(16)
+
+    LAYOUTS['blob_view_heavy'] = (BlobViewHeavy, payload(BlobViewHeavy))
+
+DIRTY = {
+    # contains undefined enum values
+    'bitfield': b'\x12\xdf\xfe\xab\xcd',
+    'enum_heavy': bytes([0x67, 0x89, 0xab, 0xcd] * 2),
+}
+
+
+def measure(func, repeat: int, number: int) -> dict:
+    times = timeit.repeat(func, repeat=repeat, number=number)
+    best = min(times) / number
+    return {
+        'best_s': best,
+        'mean_s': sum(times) / len(times) / number,
+        'ops_per_s': 1 / best if best else None,
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def cases(batch: int):
+    for name, (cls, data) in LAYOUTS.items():
+        obj = cls.from_bytes(data)
+        buffers = [data] * batch
+        objs = [cls.from_bytes(data) for _ in range(batch)]
+
+        yield name, 'from_bytes', lambda: cls.from_bytes(data), 1
+        yield name, 'to_bytes', obj.to_bytes, 1
+        yield name, 'validate', obj.validate, 1
+        yield name, 'len', cls.__len__, 1
+        yield name, 'from_bytes_batch', lambda: [cls.from_bytes(b) for b in buffers], batch
+        yield name, 'to_bytes_batch', lambda: [o.to_bytes() for o in objs], batch
+        yield name, 'validate_batch', lambda: [o.validate() for o in objs], batch
+        yield name, 'len_batch', lambda: [len(o) for o in objs], batch
+
+        if name in DIRTY:
+            dirty = DIRTY[name]
+            yield name, 'from_bytes_force', lambda: cls.from_bytes(dirty, force=True), 1
+
+
+def run(repeat: int, number: int, batch: int, only: str = None) -> dict:
+    results = []
+    for layout, op, func, items in cases(batch):
+        if only is not None and only not in f"{layout}.{op}":
+            continue
+        r = measure(func, repeat=repeat, number=max(1, number // items))
+        r.update(layout=layout, op=op, items=items,
+                 per_item_s=r['best_s'] / items)
+        results.append(r)
+        print(f"{layout:>16} {op:<18} {r['per_item_s'] * 1e6:10.2f} us/item",
+              file=sys.stderr)
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'bitstruct': getattr(bitstruct, '__version__', None),
+        'results': results,
+    }
+
+
+def compare(before_file: str, after_file: str):
+    with open(before_file) as f:
+        before = {(r['layout'], r['op']): r for r in json.load(f)['results']}
+    with open(after_file) as f:
+        after = {(r['layout'], r['op']): r for r in json.load(f)['results']}
+
+    for key in sorted(before.keys() & after.keys()):
+        b = before[key]['per_item_s']
+        a = after[key]['per_item_s']
+        print(f"{key[0]:>16} {key[1]:<18} {b * 1e6:10.2f} -> {a * 1e6:10.2f} us/item"
+              f" ({(a - b) / b * 100:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-o', '--output', help="write JSON results to this file"
+                                               " (default: stdout)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=2000,
+                        help="messages per repeat")
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('-k', dest='only', help="only run cases containing this"
+                                                " string (e.g. 'wide.to_bytes')")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(repeat=args.repeat, number=args.number, batch=args.batch,
+                  only=args.only)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
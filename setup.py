@@ -9,7 +9,7 @@ setup(
     package_dir={'': 'src'},
     python_requires=">=3.6",
     install_requires=[
-        'attrs>=17.3.0',
+        'attrs>=19.2.0',
         'bitstruct',
     ],
     setup_requires=[
@@ -1,13 +1,15 @@
 import attr
-import functools
 import bitstruct
 
-from typing import List, Callable, Iterable, Union, Dict, Any
+from typing import List, Callable, Iterable, Union, Dict, Any, Tuple, Optional
+
+from . import cache, instrumentation
 
 
 def add_methods(cls):
     """
-    Decorator to add `from_bytes()` and `to_bytes()` methods to the given class
+    Decorator to add `from_bytes()`, `to_bytes()`, `validate()`,
+    `decode_parallel()` and `__len__()` methods to the given class
     :param cls: class to decorate
     :return: decorated class
     """
@@ -15,6 +17,10 @@ def add_methods(cls):
     cls.to_bytes = to_bytes.__get__(None, cls)  # make instance method
     cls.validate = validate.__get__(None, cls)
     cls.__len__ = get_len.__get__(cls, cls)  # make classmethod
+    cls.decode_parallel = decode_parallel.__get__(cls, cls)  # make classmethod
+    cache.register(cls)
+    if instrumentation.enabled:
+        instrumentation.instrument(cls)
     return cls
 
 
@@ -22,6 +28,10 @@ def add_methods(cls):
 class BitStructInfo:
     """
     Class containing information on how to serialize/deserialize an object.
+
+    It is built up by calling add_attr() for every field. The compiled
+    bitstruct formats are cached on the object on first use. Don't modify a
+    BitStructInfo while other threads are using it.
     """
     field_name: List[str] = None
     """List of field names to access them on the object"""
@@ -50,64 +60,193 @@ class BitStructInfo:
     bytes) to the correct type
     """
 
+    chunks: List[Tuple[Optional[str], Optional[str], int, int, int, int]] = None
+    """
+    The message split up in byte-aligned chunks: tuples of
+    (from_bitstruct, to_bitstruct, byte_start, byte_end, field_start, field_end).
+    Zero-copy fields get a chunk of their own, with both format strings `None`.
+    Only runs of fields up to the last zero-copy field are recorded. Use
+    all_chunks() to include the trailing fields.
+    """
+
+    zero_copy: bool = False
+    """True if at least one field is decoded to a view over the input buffer"""
+
+    num_bits: int = None
+    """
+    Number of bits described in this BitStructInfo.
+    Calculated from from_bitstruct if not given.
+    """
+
+    chunked: Tuple[int, int, int, int] = attr.ib(default=None, init=False, repr=False, eq=False)
+    """
+    (len(from_bitstruct), len(to_bitstruct), num_bits, number of fields)
+    covered by chunks
+    """
+
+    from_compiled: Any = attr.ib(default=None, init=False, repr=False, eq=False)
+    """
+    Cache for compile_from(): compiled from_bitstruct, or for zero_copy
+    layouts, a tuple of (compiled format or None, byte_start, byte_end)
+    """
+
+    to_compiled: Any = attr.ib(default=None, init=False, repr=False, eq=False)
+    """
+    Cache for compile_to(): compiled to_bitstruct, or for zero_copy layouts,
+    a tuple of (compiled format or None, field_start, field_end)
+    """
+
     def __attrs_post_init__(self):
+        if self.num_bits is None:
+            self.num_bits = bitstruct.calcsize(self.from_bitstruct)
+        if self.chunks is None:
+            self.chunked = (0, 0, 0, 0)
+        else:
+            self.chunked = (len(self.from_bitstruct), len(self.to_bitstruct),
+                            self.num_bits, len(self.field_name or ()))
         # workaround for mutable defaults
-        for a in ('field_name', 'field_type', 'from_funcs', 'to_funcs'):
+        for a in ('field_name', 'field_type', 'from_funcs', 'to_funcs', 'chunks'):
             if getattr(self, a) is None:
                 setattr(self, a, [])
 
     @property
     def num_bytes(self):
         """Return the number of bytes described in this BitStructInfo"""
-        num_bits = bitstruct.calcsize(self.from_bitstruct)
-        if num_bits % 8 != 0:
+        if self.num_bits % 8 != 0:
             raise TypeError("Attributes do not add up to a multiple of 8 bits")
-        return num_bits // 8
+        return self.num_bits // 8
 
     @classmethod
-    @functools.lru_cache()
     def from_attr_class(cls, attrcls: type) -> 'BitStructInfo':
         """
         Read out the attr.ib()'s from class attrcls and generate the corresponding
         BitStructInfo object
 
+        The result is cached on attrcls itself, so subsequent lookups are a
+        plain dict lookup. Two threads racing on the first lookup both build
+        an identical object, and one of them ends up being cached.
+        The first lookup uses the layout loaded by `cache.load()`, if any.
+
         :param attrcls: class to inspect
         """
-        bi = cls()
-        for attribute in attr.fields(attrcls):
-            bi.add_attr(attribute)
+        bi = attrcls.__dict__.get('_structattr_bitstruct_info')
+        if bi is not None:
+            return bi
 
-        # TODO: pre-compile bitstruct fmt strings
+        bi = cache.lookup(attrcls, cls)
+        if bi is None:
+            bi = cls()
+            for attribute in attr.fields(attrcls):
+                bi.add_attr(attribute)
 
+        try:
+            setattr(attrcls, '_structattr_bitstruct_info', bi)
+        except (AttributeError, TypeError):
+            pass  # can't cache on e.g. built-in types
         return bi
 
+    def all_chunks(self) -> List[Tuple[Optional[str], Optional[str], int, int, int, int]]:
+        """
+        Return chunks, including the run of fields after the last
+        zero-copy field
+        """
+        from_pos, to_pos, bit_pos, field_pos = self.chunked
+        if field_pos == len(self.field_name) and bit_pos == self.num_bits:
+            return list(self.chunks)
+        return self.chunks + [(
+            self.from_bitstruct[from_pos:], self.to_bitstruct[to_pos:],
+            bit_pos // 8, (self.num_bits + 7) // 8,
+            field_pos, len(self.field_name),
+        )]
+
+    def compile_from(self):
+        """
+        Return the compiled format to deserialize with, compiling and caching
+        it on first use. Compiling twice from racing threads is harmless: both
+        results are equivalent and read-only.
+        """
+        compiled = self.from_compiled
+        if compiled is None:
+            if self.zero_copy:
+                compiled = tuple(
+                    (bitstruct.compile(fmt) if fmt is not None else None,
+                     byte_start, byte_end)
+                    for fmt, _, byte_start, byte_end, _, _ in self.all_chunks()
+                )
+            else:
+                compiled = bitstruct.compile(self.from_bitstruct)
+            self.from_compiled = compiled
+        return compiled
+
+    def compile_to(self):
+        """
+        Return the compiled format to serialize with, compiling and caching it
+        on first use.
+        """
+        compiled = self.to_compiled
+        if compiled is None:
+            if self.zero_copy:
+                compiled = tuple(
+                    (bitstruct.compile(fmt) if fmt is not None else None,
+                     field_start, field_end)
+                    for _, fmt, _, _, field_start, field_end in self.all_chunks()
+                )
+            else:
+                compiled = bitstruct.compile(self.to_bitstruct)
+            self.to_compiled = compiled
+        return compiled
+
     def add_attr(self, attribute):
         field_type = attribute.type
-        self.field_type.append(field_type)
         bits = field_type.bits()
-        self.field_name.append(attribute.name)
-        if hasattr(field_type, 'from_int'):
-            self.from_bitstruct += f'>u{bits}'
-            self.from_funcs.append(field_type.from_int)
-        elif hasattr(field_type, 'from_signed_int'):
-            self.from_bitstruct += f'>s{bits}'
-            self.from_funcs.append(field_type.from_signed_int)
-        elif hasattr(field_type, 'from_bytes'):
+        offset = self.num_bits
+        index = len(self.field_name)
+        if self.from_compiled is not None or self.to_compiled is not None:
+            # invalidate the compiled formats
+            self.from_compiled = None
+            self.to_compiled = None
+
+        if offset % 8 == 0 and bits % 8 == 0 \
+                and hasattr(field_type, 'from_memoryview') \
+                and hasattr(field_type, 'to_memoryview'):
+            # Byte aligned: slice the buffer instead of going through bitstruct
+            self.chunks = self.all_chunks()  # close the preceding run
             self.from_bitstruct += f'>r{bits}'
-            self.from_funcs.append(field_type.from_bytes)
-        else:
-            raise TypeError(f"Attribute {attribute.name} has no suitable `from_` method")
-        if hasattr(field_type, 'to_int'):
-            self.to_bitstruct += f'>u{bits}'
-            self.to_funcs.append(field_type.to_int)
-        elif hasattr(field_type, 'to_signed_int'):
-            self.to_bitstruct += f'>s{bits}'
-            self.to_funcs.append(field_type.to_signed_int)
-        elif hasattr(field_type, 'to_bytes'):
+            self.from_funcs.append(field_type.from_memoryview)
             self.to_bitstruct += f'>r{bits}'
-            self.to_funcs.append(field_type.to_bytes)
+            self.to_funcs.append(field_type.to_memoryview)
+            self.chunks.append((None, None, offset // 8, (offset + bits) // 8,
+                                index, index + 1))
+            self.chunked = (len(self.from_bitstruct), len(self.to_bitstruct),
+                            offset + bits, index + 1)
+            self.zero_copy = True
         else:
-            raise TypeError(f"Attribute {attribute.name} has no suitable `to_` method")
+            if hasattr(field_type, 'from_int'):
+                self.from_bitstruct += f'>u{bits}'
+                self.from_funcs.append(field_type.from_int)
+            elif hasattr(field_type, 'from_signed_int'):
+                self.from_bitstruct += f'>s{bits}'
+                self.from_funcs.append(field_type.from_signed_int)
+            elif hasattr(field_type, 'from_bytes'):
+                self.from_bitstruct += f'>r{bits}'
+                self.from_funcs.append(field_type.from_bytes)
+            else:
+                raise TypeError(f"Attribute {attribute.name} has no suitable `from_` method")
+            if hasattr(field_type, 'to_int'):
+                self.to_bitstruct += f'>u{bits}'
+                self.to_funcs.append(field_type.to_int)
+            elif hasattr(field_type, 'to_signed_int'):
+                self.to_bitstruct += f'>s{bits}'
+                self.to_funcs.append(field_type.to_signed_int)
+            elif hasattr(field_type, 'to_bytes'):
+                self.to_bitstruct += f'>r{bits}'
+                self.to_funcs.append(field_type.to_bytes)
+            else:
+                raise TypeError(f"Attribute {attribute.name} has no suitable `to_` method")
+
+        self.field_type.append(field_type)
+        self.field_name.append(attribute.name)
+        self.num_bits += bits
 
 
 class RawField:
@@ -147,7 +286,10 @@ def deserialize(data: Union[bytes, bytearray],
             raise ValueError(f"Invalid length of data: got {len(data)} bytes,"
                              f" expected {bitstruct_info.num_bytes} bytes")
 
-    fields = bitstruct.unpack(bitstruct_info.from_bitstruct, data[0:bitstruct_info.num_bytes])
+    if bitstruct_info.zero_copy:
+        fields = unpack_chunks(data, bitstruct_info, consume=consume)
+    else:
+        fields = bitstruct_info.compile_from().unpack(data[0:bitstruct_info.num_bytes])
 
     converted_fields = {}
     for i, field in enumerate(fields):
@@ -170,6 +312,36 @@ def deserialize(data: Union[bytes, bytearray],
     return converted_fields
 
 
+def unpack_chunks(data: Union[bytes, bytearray],
+                  bitstruct_info: BitStructInfo,
+                  consume: bool = False) -> List[Any]:
+    """
+    Unpack `data` chunk by chunk, returning memoryview slices for the
+    zero-copy fields instead of copying them out.
+    :param data: data to unpack
+    :param bitstruct_info: instructions to unpack
+    :param consume: `data` will be truncated afterwards. A bytearray can't be
+                    resized while views on it exist, so the zero-copy fields
+                    are copied out instead.
+    :return: raw (unconverted) field values
+    """
+    copy = consume and isinstance(data, bytearray)
+    view = memoryview(data)
+
+    fields = []
+    for fmt, byte_start, byte_end in bitstruct_info.compile_from():
+        if fmt is None:
+            value = view[byte_start:byte_end]
+            fields.append(bytes(value) if copy else value)
+        else:
+            fields.extend(fmt.unpack(view[byte_start:byte_end]))
+
+    if copy:
+        # No slices of the view are left, release it so `data` can be truncated
+        view.release()
+    return fields
+
+
 def from_bytes(cls: type,
                data: Union[bytes, bytearray],
                bitstruct_info: BitStructInfo = None,
@@ -216,7 +388,18 @@ def serialize(fields: Iterable, bitstruct_info: BitStructInfo) -> bytes:
             value = bitstruct_info.to_funcs[i](value)
         converted_fields.append(value)
 
-    return bitstruct.pack(bitstruct_info.to_bitstruct, *converted_fields)
+    if not bitstruct_info.zero_copy:
+        return bitstruct_info.compile_to().pack(*converted_fields)
+
+    # Pack the bitstruct chunks, and let join() copy the views straight
+    # into the result
+    chunks = []
+    for fmt, field_start, field_end in bitstruct_info.compile_to():
+        if fmt is None:
+            chunks.append(converted_fields[field_start])
+        else:
+            chunks.append(fmt.pack(*converted_fields[field_start:field_end]))
+    return b''.join(chunks)
 
 
 def to_bytes(self, bitstruct_info: BitStructInfo = None) -> bytes:
@@ -276,6 +459,42 @@ def get_len(cls) -> int:
     return bitstruct_info.num_bytes
 
 
+def decode_parallel(cls,
+                    buffers: Iterable[Union[bytes, bytearray]],
+                    executor,
+                    batch_size: int = 256,
+                    **kwargs) -> List[Any]:
+    """
+    Deserialize all `buffers` using the threads of `executor`
+    :param cls: class of objects to create
+    :param buffers: data to deserialize, one message per buffer
+    :param executor: concurrent.futures.ThreadPoolExecutor to run the batches
+                     on. A ProcessPoolExecutor won't work: the field types
+                     are created at runtime and can't be pickled.
+    :param batch_size: number of buffers to decode per submitted task.
+                       Bigger batches amortize the scheduling overhead.
+    :param kwargs: passed to from_bytes(). `consume` is not supported.
+    :return: list of objects of the given type, in the order of `buffers`
+    """
+    if kwargs.get('consume'):
+        raise ValueError("decode_parallel() does not support consume=True")
+
+    if kwargs.get('bitstruct_info') is None:
+        # Resolve up front, instead of racing on it in every thread
+        BitStructInfo.from_attr_class(cls)
+    decode = cls.from_bytes
+
+    def decode_batch(batch):
+        return [decode(data, **kwargs) for data in batch]
+
+    buffers = list(buffers)
+    batches = [buffers[i:i + batch_size] for i in range(0, len(buffers), batch_size)]
+    result = []
+    for decoded in executor.map(decode_batch, batches):
+        result.extend(decoded)
+    return result
+
+
 def strip_leading_underscore(f: Dict[str, Any]):
     keys = list(f.keys())
     for k in keys:
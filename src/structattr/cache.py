@@ -0,0 +1,148 @@
+"""
+Persistent cache of the layouts of add_methods() classes
+
+Building a layout inspects every field type to decide how to encode and
+decode it. The result can be saved to a file, and loaded again before the
+message classes are first used:
+
+    structattr.cache.load('layouts.json')  # before decoding anything
+
+    import mymessages
+    ...
+
+    structattr.cache.save('layouts.json', module='mymessages')
+
+Every entry is keyed by the class name, and stores a hash of the field names,
+field types and their sizes. When a class definition changes, its hash no
+longer matches and the layout is rebuilt as usual. The conversion functions
+are not stored, but looked up on the field types again.
+"""
+import attr
+import hashlib
+import json
+import os
+import weakref
+
+from typing import Dict
+
+
+VERSION = 1
+"""Version of the cache file format"""
+
+_loaded: Dict[str, dict] = {}
+_classes = weakref.WeakValueDictionary()
+
+
+def _name(attrcls: type) -> str:
+    return f"{attrcls.__module__}.{attrcls.__qualname__}"
+
+
+def schema_hash(fields) -> str:
+    """
+    Return a hash of the layout-relevant parts of the given attr.fields()
+    """
+    h = hashlib.sha256()
+    for attribute in fields:
+        field_type = attribute.type
+        h.update(f"{attribute.name}:{field_type.__module__}.{field_type.__qualname__}"
+                 f":{field_type.bits()};".encode())
+    return h.hexdigest()
+
+
+def register(attrcls: type):
+    """Remember attrcls, so save() can store its layout"""
+    _classes[_name(attrcls)] = attrcls
+
+
+def clear():
+    """Forget all loaded layouts"""
+    _loaded.clear()
+
+
+def load(path: str):
+    """
+    Load the layouts stored in `path`. A missing, unreadable or outdated
+    file is ignored.
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict) or data.get('version') != VERSION:
+        return
+    _loaded.update(data['layouts'])
+
+
+def save(path: str, module: str = None):
+    """
+    Store the layouts of all add_methods() classes in `path`
+    :param path: file to write. It is replaced atomically.
+    :param module: only store the classes defined in this module
+    """
+    import structattr
+
+    layouts = {}
+    for name, attrcls in list(_classes.items()):
+        if module is not None and attrcls.__module__ != module:
+            continue
+        try:
+            bi = structattr.BitStructInfo.from_attr_class(attrcls)
+        except (AttributeError, TypeError):
+            continue  # not a valid message class, fails the same way when used
+
+        layouts[name] = {
+            'hash': schema_hash(attr.fields(attrcls)),
+            'field_name': list(bi.field_name),
+            'from_bitstruct': bi.from_bitstruct,
+            'from_methods': [func.__name__ for func in bi.from_funcs],
+            'to_bitstruct': bi.to_bitstruct,
+            'to_methods': [func.__name__ for func in bi.to_funcs],
+            'chunks': bi.all_chunks(),
+            'zero_copy': bi.zero_copy,
+            'num_bits': bi.num_bits,
+        }
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'version': VERSION, 'layouts': layouts}, f)
+    os.replace(tmp, path)
+
+
+def lookup(attrcls: type, info_cls: type):
+    """
+    Return the cached layout of attrcls, or None if it isn't cached or the
+    class definition changed.
+    :param attrcls: class to look up
+    :param info_cls: BitStructInfo class to create
+    """
+    if not _loaded:
+        return None
+    entry = _loaded.get(_name(attrcls))
+    if entry is None:
+        return None
+
+    fields = attr.fields(attrcls)
+    if entry['hash'] != schema_hash(fields):
+        return None
+
+    field_type = [attribute.type for attribute in fields]
+    try:
+        from_funcs = [getattr(t, method)
+                      for t, method in zip(field_type, entry['from_methods'])]
+        to_funcs = [getattr(t, method)
+                    for t, method in zip(field_type, entry['to_methods'])]
+    except AttributeError:
+        return None  # type changed, without changing its name or size
+
+    return info_cls(
+        field_name=list(entry['field_name']),
+        field_type=field_type,
+        from_bitstruct=entry['from_bitstruct'],
+        from_funcs=from_funcs,
+        to_bitstruct=entry['to_bitstruct'],
+        to_funcs=to_funcs,
+        chunks=[tuple(chunk) for chunk in entry['chunks']],
+        zero_copy=entry['zero_copy'],
+        num_bits=entry['num_bits'],
+    )
@@ -0,0 +1,295 @@
+"""
+Opt-in instrumentation of from_bytes(), to_bytes() and validate()
+
+The methods are wrapped when `add_methods()` runs, so only classes that are
+decorated *after* calling `enable()` are instrumented. Classes decorated while
+instrumentation is disabled run without any overhead:
+
+    structattr.instrumentation.enable()
+
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        ...
+
+    structattr.instrumentation.snapshot()
+    # {'mymodule.MyMessage': {'from_bytes': {'calls': 1, ...}, ...}}
+
+To push the statistics to a metrics system, register an exporter and call
+`export()` periodically:
+
+    structattr.instrumentation.add_exporter(lambda stats: ...)
+    structattr.instrumentation.export(reset=True)
+"""
+import attr
+import functools
+import threading
+import time
+import weakref
+
+import structattr
+
+from typing import Callable, Dict, List, Tuple
+
+
+enabled = False
+"""Instrument classes decorated with add_methods()"""
+
+
+@attr.s(slots=True, auto_attribs=True)
+class OpStats:
+    """
+    Statistics of a single method of a single class
+    """
+    calls: int = 0
+    """Number of calls, including the failed ones"""
+
+    errors: int = 0
+    """Number of calls that raised a ValueError"""
+
+    forced: int = 0
+    """Number of fields that were stored as RawField because of `force=True`"""
+
+    bytes: int = 0
+    """Number of bytes decoded or encoded"""
+
+    time: float = 0.
+    """Cumulative time spent, in seconds"""
+
+
+class _ThreadStats:
+    """
+    Statistics recorded by a single thread
+
+    Every thread records into its own OpStats, so instrumented calls from
+    different threads don't contend on a lock. The per-thread lock is only
+    contended while a snapshot() is taken. When the thread ends, its
+    statistics are merged into the shared totals by _retire().
+    """
+    __slots__ = ('lock', 'stats')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats: Dict[Tuple[str, str], OpStats] = {}
+
+
+OPS = ('from_bytes', 'to_bytes', 'validate')
+
+_lock = threading.Lock()
+_classes: List[str] = []
+_threads: List[_ThreadStats] = []
+_retired: Dict[Tuple[str, str], OpStats] = {}
+"""Statistics of threads that have ended"""
+_local = threading.local()
+_exporters: List[Callable[[Dict[str, Dict[str, dict]]], None]] = []
+
+
+def enable():
+    """Instrument classes decorated with add_methods() from now on"""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """
+    Stop instrumenting newly decorated classes
+
+    Already instrumented classes keep recording.
+    """
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Clear all recorded statistics"""
+    snapshot(reset=True)
+
+
+def snapshot(reset: bool = False) -> Dict[str, Dict[str, dict]]:
+    """
+    Return a copy of the recorded statistics
+    :param reset: clear the statistics after copying them
+    :return: {class name: {method name: {statistic: value}}}
+    """
+    with _lock:
+        totals = {name: {op: OpStats() for op in OPS} for name in _classes}
+        _merge(totals, _retired)
+        if reset:
+            _retired.clear()
+        threads = list(_threads)
+
+    for thread in threads:
+        with thread.lock:
+            _merge(totals, thread.stats)
+            if reset:
+                thread.stats.clear()
+
+    return {
+        name: {op: attr.asdict(stats) for op, stats in ops.items()}
+        for name, ops in totals.items()
+    }
+
+
+def add_exporter(exporter: Callable[[Dict[str, Dict[str, dict]]], None]):
+    """
+    Register a function to be called with a snapshot() on every export()
+    """
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter: Callable[[Dict[str, Dict[str, dict]]], None]):
+    _exporters.remove(exporter)
+
+
+def export(reset: bool = False):
+    """
+    Pass a snapshot() to all registered exporters
+    :param reset: clear the statistics afterwards, so every export only
+                  contains the calls since the previous one
+    """
+    snap = snapshot(reset=reset)
+    for exporter in list(_exporters):
+        exporter(snap)
+
+
+def _add(total: OpStats, stats: OpStats):
+    total.calls += stats.calls
+    total.errors += stats.errors
+    total.forced += stats.forced
+    total.bytes += stats.bytes
+    total.time += stats.time
+
+
+def _merge(totals: Dict[str, Dict[str, OpStats]],
+           stats: Dict[Tuple[str, str], OpStats]):
+    for (name, op), s in stats.items():
+        _add(totals[name][op], s)
+
+
+def _retire(thread: _ThreadStats):
+    with _lock:
+        _threads.remove(thread)
+        with thread.lock:
+            for key, stats in thread.stats.items():
+                _add(_retired.setdefault(key, OpStats()), stats)
+
+
+class _ThreadToken:
+    """
+    Stored in thread-local storage. It is deleted when the thread ends,
+    which triggers _retire()
+    """
+    __slots__ = ('thread', '__weakref__')
+
+    def __init__(self, thread: _ThreadStats):
+        self.thread = thread
+
+
+def _thread_stats() -> _ThreadStats:
+    thread = _ThreadStats()
+    token = _ThreadToken(thread)
+    weakref.finalize(token, _retire, thread)
+    _local.token = token
+    with _lock:
+        _threads.append(thread)
+    return thread
+
+
+def _record(name: str, op: str, start: float,
+            num_bytes: int = 0, error: bool = False, forced: int = 0):
+    elapsed = time.perf_counter() - start
+    try:
+        thread = _local.token.thread
+    except AttributeError:
+        thread = _thread_stats()
+    with thread.lock:
+        try:
+            stats = thread.stats[(name, op)]
+        except KeyError:
+            stats = thread.stats[(name, op)] = OpStats()
+        stats.calls += 1
+        stats.time += elapsed
+        stats.bytes += num_bytes
+        stats.forced += forced
+        if error:
+            stats.errors += 1
+
+
+def instrument(cls):
+    """
+    Wrap the methods added by add_methods() to record statistics
+    :param cls: class to instrument
+    :return: instrumented class
+    """
+    name = f"{cls.__module__}.{cls.__qualname__}"
+    with _lock:
+        if name not in _classes:
+            _classes.append(name)
+
+    orig_from_bytes = cls.from_bytes
+    orig_to_bytes = cls.to_bytes
+    orig_validate = cls.validate
+    default_info = None  # resolved on first use, like from_bytes() does
+
+    @functools.wraps(orig_from_bytes)
+    def from_bytes(data, *args, **kwargs):
+        nonlocal default_info
+        start = time.perf_counter()
+        num_bytes = forced = 0
+        error = False
+        try:
+            obj = orig_from_bytes(data, *args, **kwargs)
+
+            # from_bytes(data, bitstruct_info, ignore_too_long, consume, force)
+            bitstruct_info = kwargs.get('bitstruct_info', args[0] if len(args) > 0 else None)
+            force = kwargs.get('force', args[3] if len(args) > 3 else False)
+            if bitstruct_info is None:
+                if default_info is None:
+                    default_info = structattr.BitStructInfo.from_attr_class(cls)
+                bitstruct_info = default_info
+
+            num_bytes = bitstruct_info.num_bytes
+            if force:
+                forced = sum(
+                    isinstance(getattr(obj, field_name), structattr.RawField)
+                    for field_name in bitstruct_info.field_name
+                )
+            return obj
+        except ValueError:
+            error = True
+            raise
+        finally:
+            _record(name, 'from_bytes', start,
+                    num_bytes=num_bytes, error=error, forced=forced)
+
+    @functools.wraps(orig_to_bytes)
+    def to_bytes(self, *args, **kwargs):
+        start = time.perf_counter()
+        num_bytes = 0
+        error = False
+        try:
+            data = orig_to_bytes(self, *args, **kwargs)
+            num_bytes = len(data)
+            return data
+        except ValueError:
+            error = True
+            raise
+        finally:
+            _record(name, 'to_bytes', start, num_bytes=num_bytes, error=error)
+
+    @functools.wraps(orig_validate)
+    def validate(self, *args, **kwargs):
+        start = time.perf_counter()
+        error = False
+        try:
+            return orig_validate(self, *args, **kwargs)
+        except ValueError:
+            error = True
+            raise
+        finally:
+            _record(name, 'validate', start, error=error)
+
+    cls.from_bytes = staticmethod(from_bytes)
+    cls.to_bytes = to_bytes
+    cls.validate = validate
+    return cls
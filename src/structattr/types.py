@@ -19,6 +19,12 @@ For a type to be usable as field type, it needs several methods:
       obj.to_bytes() -> bytes
   Note: the data from to_bytes must be left-aligned (only relevant if bits() % 8 != 0)
 
+* optionally, for zero-copy byte fields, both of:
+      cls.from_memoryview(data: memoryview) -> cls
+      obj.to_memoryview() -> memoryview
+  These are used instead of the above when the field starts on a byte
+  boundary. The memoryview refers to the original input buffer.
+
 
 All variable-width type classes are wrapped in Memoized functions. This
 guarantees that the *same* class is returned for two UInt(8) types, instead
@@ -29,7 +35,29 @@ import enum
 import functools
 
 
-@functools.lru_cache(maxsize=None)
+def memoize(func):
+    """
+    Cache the results of `func`, without eviction.
+
+    Unlike functools.lru_cache(), this guarantees that concurrent first calls
+    from different threads all return the same object: only the first result
+    stored is ever returned. Lookups don't take a lock.
+    """
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        return cache.setdefault(key, func(*args, **kwargs))
+
+    return wrapper
+
+
+@memoize
 def Enum(bits: int):
     """
     Returns a Enum-like class with the needed methods
@@ -63,7 +91,7 @@ class One(Enum(1)):
     One = 1
 
 
-@functools.lru_cache(maxsize=None)
+@memoize
 def UInt(bits: int):
     """
     Returns a class holding a fixed width unsigned integer
@@ -93,7 +121,7 @@ def UInt(bits: int):
 Bool = UInt(1)
 
 
-@functools.lru_cache(maxsize=None)
+@memoize
 def SInt(bits: int):
     """
     Returns a class holding a fixed width signed (2's complement) integer
@@ -120,7 +148,7 @@ def SInt(bits: int):
     return UInt
 
 
-@functools.lru_cache(maxsize=None)
+@memoize
 def FixedPointSInt(total_bits: int = None,
                    integer_bits: int = None,
                    fractional_bits: int = None,
@@ -168,7 +196,7 @@ def FixedPointSInt(total_bits: int = None,
     return FixedPointSInt
 
 
-@functools.lru_cache(maxsize=None)
+@memoize
 def Bytes(num_bytes: int):
     class Bytes(bytes):
         @classmethod
@@ -183,3 +211,82 @@ def Bytes(num_bytes: int):
             return self
 
     return Bytes
+
+
+@memoize
+def BytesView(num_bytes: int):
+    """
+    Returns a class holding `num_bytes` bytes of arbitrary data, like Bytes(),
+    but without copying it.
+
+    When the field is byte-aligned in the message, it refers to the input
+    buffer by means of a memoryview. Changes to a bytearray input are thus
+    visible through the field. Unaligned fields are decoded from (and hold)
+    a copy.
+
+    Note that a bytearray can't be resized while a view on it exists: as long
+    as the decoded message is alive, appending to or deleting from the input
+    raises BufferError. Either decode from a `bytes` object, or pass
+    `consume=True`, which copies the BytesView fields out of the bytearray
+    before removing the message from it.
+    """
+    class BytesView:
+        __slots__ = ('data',)
+
+        @classmethod
+        def bits(cls):
+            return num_bytes * 8
+
+        @classmethod
+        def from_memoryview(cls, data: memoryview):
+            return cls(data)
+
+        @classmethod
+        def from_bytes(cls, data: bytes):
+            return cls(data)
+
+        def to_memoryview(self) -> memoryview:
+            # May be called unbound on a plain bytes-like value as well
+            if isinstance(self, BytesView):
+                return self.data
+            try:
+                data = memoryview(self)
+            except TypeError as e:
+                raise ValueError(f"{self.__class__.__name__} is not bytes-like") from e
+            if data.nbytes != num_bytes:
+                raise ValueError(f"Expected {num_bytes} bytes, got {data.nbytes}")
+            return data
+
+        def to_bytes(self) -> bytes:
+            return bytes(BytesView.to_memoryview(self))
+
+        def __init__(self, data):
+            data = memoryview(data)
+            if data.nbytes != num_bytes:
+                raise ValueError(f"Expected {num_bytes} bytes, got {data.nbytes}")
+            self.data = data
+
+        def __bytes__(self):
+            return bytes(self.data)
+
+        def __len__(self):
+            return num_bytes
+
+        def __getitem__(self, item):
+            return self.data[item]
+
+        def __eq__(self, other):
+            if isinstance(other, BytesView):
+                other = other.data
+            try:
+                return self.data == other
+            except TypeError:
+                return NotImplemented
+
+        def __hash__(self):
+            return hash(bytes(self.data))
+
+        def __repr__(self):
+            return f"{self.__class__.__name__}({bytes(self.data)!r})"
+
+    return BytesView
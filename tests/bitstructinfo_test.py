@@ -0,0 +1,73 @@
+import attr
+import bitstruct
+import pytest
+import types
+from structattr import BitStructInfo, deserialize, serialize
+from structattr.types import UInt, BytesView
+
+from . import usage_test, subclassing_test, zero_copy_test
+
+
+def test_manual():
+    bi = BitStructInfo(field_name=['h'], field_type=[UInt(8)],
+                       from_bitstruct='>u8', from_funcs=[UInt(8).from_int],
+                       to_bitstruct='>u8', to_funcs=[UInt(8).to_int])
+    assert bi.num_bits == 8
+    assert bi.num_bytes == 1
+    assert deserialize(b'\x05', bi) == {'h': 5}
+    assert serialize([UInt(8)(5)], bi) == b'\x05'
+
+
+def test_manual_then_add_attr():
+    bi = BitStructInfo(field_name=['h'], field_type=[UInt(8)],
+                       from_bitstruct='>u8', from_funcs=[UInt(8).from_int],
+                       to_bitstruct='>u8', to_funcs=[UInt(8).to_int])
+    bi.add_attr(types.SimpleNamespace(name='p', type=BytesView(2)))
+    assert bi.zero_copy
+    assert bi.num_bytes == 3
+
+    fields = deserialize(b'\x05ab', bi)
+    assert fields['h'] == 5
+    assert fields['p'] == b'ab'
+    assert serialize([fields['h'], fields['p']], bi) == b'\x05ab'
+
+
+@pytest.mark.parametrize('cls', [
+    usage_test.MyMessage,
+    subclassing_test.MyMessage,
+    subclassing_test.MyMessageDeriv,
+    zero_copy_test.MyMessage,
+    zero_copy_test.MyUnalignedMessage,
+])
+def test_num_bytes(cls):
+    bi = BitStructInfo.from_attr_class(cls)
+    assert bi.num_bits == bitstruct.calcsize(bi.from_bitstruct)
+    assert bi.num_bytes == bitstruct.calcsize(bi.from_bitstruct) // 8
+
+
+def test_compile():
+    bi = BitStructInfo()
+    for attribute in attr.fields(usage_test.MyMessage):
+        bi.add_attr(attribute)
+    assert bi.from_compiled is None
+
+    data = b'\x12\xbf\xfe\xab\xcd'
+    assert bi.compile_from().unpack(data) == bitstruct.unpack(bi.from_bitstruct, data)
+    assert bi.from_compiled is bi.compile_from()
+    assert bi.to_compiled is None
+
+
+def test_compile_zero_copy():
+    bi = BitStructInfo()
+    for attribute in attr.fields(zero_copy_test.MyMessage):
+        bi.add_attr(attribute)
+    assert [c[0] is None for c in bi.compile_from()] == [False, True, False]
+    assert [c[0] is None for c in bi.compile_to()] == [False, True, False]
+
+    # add_attr() invalidates the compiled formats
+    deserialize(b'\x12\xde\xad\xbe\xef\xff', bi)
+    bi.add_attr(attr.fields(zero_copy_test.MyMessage).header)
+    assert bi.from_compiled is None
+    assert bi.num_bytes == 7
+    fields = deserialize(b'\x12\xde\xad\xbe\xef\xff\x34', bi)
+    assert fields['header'] == 0x34
@@ -0,0 +1,64 @@
+import attr
+import pytest
+import structattr
+from structattr import cache, BitStructInfo
+from structattr.types import UInt, SInt, Bytes, BytesView
+
+
+def make_message(payload_type):
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        header: UInt(8)
+        payload: payload_type
+        value: SInt(4)
+        flag: UInt(4)
+
+    return MyMessage
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    try:
+        yield str(tmp_path / 'layouts.json')
+    finally:
+        cache.clear()
+
+
+def test_roundtrip(cache_file):
+    MyMessage = make_message(BytesView(2))
+    built = BitStructInfo.from_attr_class(MyMessage)
+    cache.save(cache_file, module=__name__)
+
+    cache.load(cache_file)
+    MyMessage = make_message(BytesView(2))
+    cached = cache.lookup(MyMessage, BitStructInfo)
+    assert cached is not None
+    for a in ('field_name', 'field_type', 'from_bitstruct', 'from_funcs',
+              'to_bitstruct', 'to_funcs', 'zero_copy', 'num_bits'):
+        assert getattr(cached, a) == getattr(built, a)
+    assert cached.all_chunks() == built.all_chunks()
+
+    assert BitStructInfo.from_attr_class(MyMessage) == cached
+    m = MyMessage.from_bytes(b'\x12ab\xf3')
+    assert m.payload == b'ab'
+    assert m.value == -1
+    assert m.to_bytes() == b'\x12ab\xf3'
+
+
+def test_invalidation(cache_file):
+    MyMessage = make_message(BytesView(2))
+    BitStructInfo.from_attr_class(MyMessage)
+    cache.save(cache_file)
+
+    cache.load(cache_file)
+    assert cache.lookup(make_message(Bytes(2)), BitStructInfo) is None
+    assert cache.lookup(make_message(BytesView(3)), BitStructInfo) is None
+
+    MyMessage = make_message(Bytes(2))
+    assert MyMessage.from_bytes(b'\x12ab\xf3').payload == b'ab'
+
+
+def test_missing_file(cache_file):
+    cache.load(cache_file)
+    assert cache.lookup(make_message(Bytes(2)), BitStructInfo) is None
@@ -0,0 +1,129 @@
+import attr
+import concurrent.futures
+import gc
+import pytest
+import structattr
+import threading
+from structattr import instrumentation
+from structattr.types import UInt, Enum
+
+
+@pytest.fixture
+def instrumented():
+    instrumentation.enable()
+    try:
+        yield
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+
+
+def test_disabled():
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        header: UInt(8)
+
+    MyMessage.from_bytes(b'\x12')
+    assert f"{__name__}.{MyMessage.__qualname__}" not in instrumentation.snapshot()
+
+
+def test_counters(instrumented):
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        header: UInt(8)
+
+        class Mode(Enum(8)):
+            Off = 0
+            On = 1
+        mode: Mode
+
+    m = MyMessage.from_bytes(b'\x12\x01')
+    assert m.to_bytes() == b'\x12\x01'
+    m.validate()
+
+    with pytest.raises(ValueError):
+        MyMessage.from_bytes(b'\x12\x02')
+    m = MyMessage.from_bytes(b'\x12\x02', force=True)
+    assert isinstance(m.mode, structattr.RawField)
+
+    exported = []
+    instrumentation.add_exporter(exported.append)
+    try:
+        instrumentation.export(reset=True)
+    finally:
+        instrumentation.remove_exporter(exported.append)
+
+    stats = exported[0][f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 3
+    assert stats['from_bytes']['errors'] == 1
+    assert stats['from_bytes']['forced'] == 1
+    assert stats['from_bytes']['bytes'] == 4
+    assert stats['from_bytes']['time'] > 0
+    assert stats['to_bytes']['calls'] == 1
+    assert stats['to_bytes']['bytes'] == 2
+    assert stats['validate']['calls'] == 1
+
+    stats = instrumentation.snapshot()[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 0
+
+
+def test_positional_and_threads(instrumented):
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        class Mode(Enum(8)):
+            Off = 0
+            On = 1
+        mode: Mode
+
+    m = MyMessage.from_bytes(b'\x02', None, False, False, True)
+    assert isinstance(m.mode, structattr.RawField)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(MyMessage.from_bytes, [b'\x01'] * 100))
+
+    stats = instrumentation.snapshot()[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 101
+    assert stats['from_bytes']['forced'] == 1
+    assert stats['from_bytes']['bytes'] == 101
+
+    instrumentation.reset()
+    stats = instrumentation.snapshot()[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 0
+
+
+def test_ended_threads(instrumented):
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        header: UInt(8)
+
+    threads_before = len(instrumentation._threads)
+    for _ in range(50):
+        t = threading.Thread(target=MyMessage.from_bytes, args=(b'\x01',))
+        t.start()
+        t.join()
+    gc.collect()
+    assert len(instrumentation._threads) <= threads_before + 1
+
+    stats = instrumentation.snapshot(reset=True)[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 50
+    stats = instrumentation.snapshot()[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['from_bytes']['calls'] == 0
+
+
+def test_other_exceptions(instrumented):
+    @structattr.add_methods
+    @attr.s(slots=True, auto_attribs=True)
+    class MyMessage:
+        header: UInt(8)
+
+    m = MyMessage(header=None)
+    with pytest.raises(TypeError):
+        m.to_bytes()
+
+    stats = instrumentation.snapshot()[f"{__name__}.{MyMessage.__qualname__}"]
+    assert stats['to_bytes']['calls'] == 1
+    assert stats['to_bytes']['errors'] == 0
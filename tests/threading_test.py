@@ -0,0 +1,49 @@
+import attr
+import concurrent.futures
+import pytest
+import threading
+import structattr
+from structattr.types import UInt, SInt, Bytes, memoize
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class MyMessage:
+    header: UInt(8)
+    value: SInt(8)
+    blob: Bytes(2)
+
+
+def test_decode_parallel():
+    buffers = [bytes([i, 0xff, i, i]) for i in range(256)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        messages = MyMessage.decode_parallel(buffers, executor, batch_size=10)
+
+    assert [m.to_bytes() for m in messages] == buffers
+    assert messages[3].header == 3
+    assert messages[3].value == -1
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        with pytest.raises(ValueError):
+            MyMessage.decode_parallel([b'\x00'], executor)
+
+
+def test_cached_on_class():
+    bi = structattr.BitStructInfo.from_attr_class(MyMessage)
+    assert isinstance(bi, structattr.BitStructInfo)
+    assert bi is structattr.BitStructInfo.from_attr_class(MyMessage)
+    assert MyMessage.__dict__['_structattr_bitstruct_info'] is bi
+
+
+def test_memoize_concurrent():
+    threads = 4
+    barrier = threading.Barrier(threads)
+
+    @memoize
+    def factory(x):
+        barrier.wait(timeout=5)  # make sure all threads miss the cache
+        return object()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(factory, [1] * threads))
+    assert all(r is results[0] for r in results)
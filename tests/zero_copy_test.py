@@ -0,0 +1,103 @@
+import attr
+import pytest
+import structattr
+from structattr.types import UInt, SInt, BytesView
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class MyMessage:
+    header: UInt(8)
+    payload: BytesView(4)
+    flag: UInt(1)
+    value: SInt(7)
+
+
+@structattr.add_methods
+@attr.s(slots=True, auto_attribs=True)
+class MyUnalignedMessage:
+    header: UInt(4)
+    payload: BytesView(2)
+    trailer: UInt(4)
+
+
+def test_usage():
+    b = b'\x12\xde\xad\xbe\xef\xff'
+    m = MyMessage.from_bytes(b)
+    assert m.to_bytes() == b
+
+    assert m.header == 0x12
+    assert m.payload == b'\xde\xad\xbe\xef'
+    assert m.flag == 1
+    assert m.value == -1
+    assert MyMessage.__len__() == 6
+    m.validate()
+
+
+def test_view_on_input():
+    b = bytearray(b'\x12\xde\xad\xbe\xef\xff')
+    m = MyMessage.from_bytes(b)
+    assert m.payload.to_memoryview().obj is b
+
+    b[1] = 0x00
+    assert m.payload == b'\x00\xad\xbe\xef'
+
+
+def test_bytearray_locked():
+    b = bytearray(b'\x12\xde\xad\xbe\xef\xff')
+    m = MyMessage.from_bytes(b, ignore_too_long=True)
+    with pytest.raises(BufferError):
+        b += b'\x00'
+    with pytest.raises(BufferError):
+        del b[0:3]
+
+    del m
+    b += b'\x00'
+    assert len(b) == 7
+
+
+def test_consume():
+    b = bytearray(b'\x12\xde\xad\xbe\xef\xff\x00')
+    m = MyMessage.from_bytes(b, consume=True)
+    assert b == b'\x00'
+    assert m.payload == b'\xde\xad\xbe\xef'
+
+    b += b'\x01'
+    assert b == b'\x00\x01'
+    assert m.payload == b'\xde\xad\xbe\xef'
+
+
+def test_unaligned():
+    b = b'\x1d\xea\xdf'
+    m = MyUnalignedMessage.from_bytes(b)
+    assert m.to_bytes() == b
+
+    assert m.header == 0x1
+    assert m.payload == b'\xde\xad'
+    assert m.trailer == 0xf
+
+
+def test_convert():
+    m = MyMessage(header=UInt(8)(0), payload=b'abcd',
+                  flag=UInt(1)(0), value=SInt(7)(0))
+    with pytest.raises(ValueError):
+        m.validate()
+    m.validate(convert=True)
+    assert m.to_bytes() == b'\x00abcd\x00'
+
+    with pytest.raises(ValueError):
+        BytesView(4)(b'abc')
+
+
+def test_raw_bytes():
+    m = MyMessage(header=UInt(8)(0), payload=b'abcd',
+                  flag=UInt(1)(0), value=SInt(7)(0))
+    assert m.to_bytes() == b'\x00abcd\x00'
+
+    m = MyUnalignedMessage(header=UInt(4)(1), payload=bytearray(b'\xde\xad'),
+                           trailer=UInt(4)(0xf))
+    assert m.to_bytes() == b'\x1d\xea\xdf'
+
+    m.payload = b'abc'
+    with pytest.raises(ValueError):
+        m.to_bytes()